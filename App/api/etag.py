@@ -0,0 +1,20 @@
+def _opaca(etag):
+    # Comparação fraca (RFC 7232, 2.3.2): W/"x" e "x" valem o mesmo
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    return etag
+
+
+def nao_modificado(if_none_match, etag):
+    """
+    True se o If-None-Match cobre o ETag atual (resposta pode ser 304).
+
+    Aceita "*", uma lista separada por vírgulas e validadores fracos (W/"...").
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    atual = _opaca(etag)
+    return any(_opaca(candidato) == atual for candidato in if_none_match.split(","))
@@ -1,25 +1,55 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
 from typing import List
 
-from App.db.connection import engine, Base, get_db
+from App.api.etag import nao_modificado
+from App.db.connection import Base
+from App.db.tenants import TenantMiddleware, get_catalogo, get_db, get_read_db, tenant_atual, tenants
+from App.db import repositorio
+from App.db.catalogo import CatalogoCache
+from App.db.transacao import executar_transacao, metricas as metricas_transacao
 # Imports dos Modelos
 from App.models.cliente import Cliente
 from App.models.comanda import Comanda
 from App.models.item import ItemComanda
+from App.models.produto import Produto
+from App.models.job import Job  # noqa: F401 (registra a tabela "jobs")
+from App.models.recibo import Recibo  # noqa: F401 (registra a tabela "recibos")
 # Imports dos Schemas
 from App.schemas.cliente import ClienteCreate, ClienteResponse
 from App.schemas.comanda import ComandaCreate, ComandaResponse
 from App.schemas.item import ItemCreate, ItemResponse
+from App.schemas.produto import ProdutoCreate, ProdutoUpdate, ProdutoResponse
+from App.schemas.recibo import ReciboResponse
+# Tarefas em segundo plano (importar "tarefas" registra os handlers)
+from App.jobs import tarefas  # noqa: F401
+from App.jobs.fila import enfileirar, pool
+# Frontend (HTML/CSS/JS) servido pela própria API
+from App.web import assets
 
-# Cria todas as tabelas no banco de dados (SQLite)
-Base.metadata.create_all(bind=engine)
+# Manifest dos assets com hash + .gz/.br, lido no primeiro acesso a /app.
+# Quem gera é o `poetry run task front`; sem ele só o frontend fica fora do ar.
+manifesto_frontend = None
+
+# Respostas JSON acima deste tamanho (bytes) saem comprimidas com gzip
+GZIP_MINIMO = 1000
+
+# Sobe os workers de jobs junto com a API e os para no desligamento
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool.iniciar()
+    yield
+    pool.parar()
+    tenants.fechar_todos()
 
 app = FastAPI(
     title="Pesqueiro Manager API",
     description="Sistema de Gestão de Clientes e Consumo",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configuração CORS 
@@ -31,117 +61,264 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Os assets do frontend já vêm comprimidos (Content-Encoding definido) e são ignorados aqui
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMO)
+
+# Um banco por pesqueiro: escolhido pelo prefixo /u/<nome>/ ou pelo header X-Pesqueiro.
+# As tabelas de cada banco são criadas no primeiro uso.
+app.add_middleware(TenantMiddleware)
+
 @app.get("/")
 async def root():
     return {"status": "Online", "modulo": "Gestão de Comandas"}
 
+# --- FRONTEND ---
+def carregar_frontend():
+    global manifesto_frontend
+    if manifesto_frontend is None:
+        try:
+            manifesto_frontend = assets.carregar()
+        except RuntimeError:
+            raise HTTPException(status_code=503, detail="Frontend não gerado. Rode `poetry run task front`.")
+    return manifesto_frontend
+
+@app.get("/app", include_in_schema=False)
+@app.get("/app/", include_in_schema=False)
+def frontend(request: Request):
+    return assets.responder(carregar_frontend()["pagina"], request, cache_control=assets.CACHE_PAGINA)
+
+@app.get("/app/static/{nome}", include_in_schema=False)
+def frontend_asset(nome: str, request: Request):
+    entrada = carregar_frontend()["assets"].get(nome)
+    if not entrada:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    return assets.responder(entrada, request)
+
 # --- CLIENTES ---
 @app.post("/clientes", response_model=ClienteResponse)
 def criar_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
-    db_cliente = Cliente(**cliente.model_dump())
-    db.add(db_cliente)
-    try:
-        db.commit()
-        db.refresh(db_cliente)
+    def operacao(db):
+        db_cliente = Cliente(**cliente.model_dump())
+        db.add(db_cliente)
         return db_cliente
-    except Exception:
-        raise HTTPException(status_code=400, detail="Erro. CPF já cadastrado?")
+
+    db_cliente = executar_transacao(db, operacao, "criar_cliente", erro_integridade="Erro. CPF já cadastrado?")
+    db.refresh(db_cliente)
+    return db_cliente
 
 @app.get("/clientes", response_model=List[ClienteResponse])
-def listar_clientes(db: Session = Depends(get_db)):
-    return db.query(Cliente).all()
+def listar_clientes(db: Session = Depends(get_read_db)):
+    return repositorio.listar_clientes(db)
 
 @app.get("/clientes/{cliente_id}", response_model=ClienteResponse)
-def buscar_cliente_por_id(cliente_id: int, db: Session = Depends(get_db)):
-    cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
+def buscar_cliente_por_id(cliente_id: int, db: Session = Depends(get_read_db)):
+    cliente = repositorio.buscar_cliente(db, cliente_id)
 
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
 
     return cliente
     
+# --- PRODUTOS (CATÁLOGO) ---
+@app.post("/produtos", response_model=ProdutoResponse)
+def criar_produto(produto: ProdutoCreate, db: Session = Depends(get_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    if produto.preco < 0.0:
+        raise HTTPException(status_code=422, detail="Valor inválido.")
+
+    def operacao(db):
+        # Nome de produto removido do catálogo: reativa a mesma linha (o nome é único)
+        db_produto = repositorio.produto_por_nome(db, produto.nome)
+        if db_produto is not None and not db_produto.ativo:
+            db_produto.preco = produto.preco
+            db_produto.ativo = True
+            return db_produto
+
+        db_produto = Produto(**produto.model_dump())
+        db.add(db_produto)
+        return db_produto
+
+    db_produto = executar_transacao(db, operacao, "criar_produto", erro_integridade="Erro. Produto já cadastrado?")
+    db.refresh(db_produto)
+    catalogo.invalidar()
+    return db_produto
+
+@app.get("/produtos", response_model=List[ProdutoResponse])
+def listar_produtos(request: Request, response: Response, db: Session = Depends(get_read_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    produtos, etag = catalogo.listar(db)
+    if nao_modificado(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return produtos
+
+@app.get("/produtos/{produto_id}", response_model=ProdutoResponse)
+def buscar_produto(produto_id: int, db: Session = Depends(get_read_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    produto = catalogo.obter(db, produto_id)
+    if not produto:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    return produto
+
+@app.put("/produtos/{produto_id}", response_model=ProdutoResponse)
+def atualizar_produto(produto_id: int, dados: ProdutoUpdate, db: Session = Depends(get_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    if dados.preco is not None and dados.preco < 0.0:
+        raise HTTPException(status_code=422, detail="Valor inválido.")
+
+    def operacao(db):
+        produto = repositorio.buscar_produto(db, produto_id)
+        if not produto:
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+
+        for campo, valor in dados.model_dump(exclude_none=True).items():
+            setattr(produto, campo, valor)
+        return produto
+
+    produto = executar_transacao(db, operacao, "atualizar_produto", erro_integridade="Erro. Produto já cadastrado?")
+    db.refresh(produto)
+    catalogo.invalidar()
+    return produto
+
+@app.delete("/produtos/{produto_id}")
+def remover_produto(produto_id: int, db: Session = Depends(get_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    def operacao(db):
+        produto = repositorio.buscar_produto(db, produto_id)
+        if not produto:
+            raise HTTPException(status_code=404, detail="Produto não encontrado.")
+
+        # Só tira do catálogo: itens já lançados continuam apontando para ele
+        produto.ativo = False
+
+    executar_transacao(db, operacao, "remover_produto")
+    catalogo.invalidar()
+
+    return {"message": f"Produto {produto_id} removido do catálogo."}
+
 # --- COMANDAS ---
 @app.post("/comandas", response_model=ComandaResponse)
 def abrir_comanda(comanda: ComandaCreate, db: Session = Depends(get_db)):
-    cliente = db.query(Cliente).filter(Cliente.id == comanda.cliente_id).first()
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    def operacao(db):
+        cliente = repositorio.buscar_cliente(db, comanda.cliente_id)
+        if not cliente:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+
+        comanda_exists = repositorio.comanda_do_cliente(db, cliente.id)
+        if comanda_exists:
+            raise HTTPException(status_code=422, detail="Erro, este cliente já possui uma comanda cadastrada.")
 
-    comanda_exists = db.query(Comanda).filter(Comanda.cliente_id == cliente.id).first()
-    if comanda_exists:
-        raise HTTPException(status_code=422, detail="Erro, este cliente já possui uma comanda cadastrada.")
+        db_comanda = Comanda(cliente_id=comanda.cliente_id)
+        db.add(db_comanda)
+        return db_comanda
 
-    db_comanda = Comanda(cliente_id=comanda.cliente_id)
-    db.add(db_comanda)
-    db.commit()
+    db_comanda = executar_transacao(db, operacao, "abrir_comanda")
     db.refresh(db_comanda)
     return db_comanda
 
 @app.get("/comandas/{comanda_id}", response_model=ComandaResponse)
-def ver_comanda(comanda_id: int, db: Session = Depends(get_db)):
-    comanda = db.query(Comanda).filter(Comanda.id == comanda_id).first()
+def ver_comanda(comanda_id: int, db: Session = Depends(get_read_db)):
+    comanda = repositorio.buscar_comanda(db, comanda_id)
     if not comanda:
         raise HTTPException(status_code=404, detail="Comanda não encontrada")
     return comanda
 
 # --- ITENS (CONSUMO) ---
 @app.post("/itens", response_model=ItemResponse)
-def adicionar_item(item: ItemCreate, db: Session = Depends(get_db)):
-    comanda = db.query(Comanda).filter(Comanda.id == item.comanda_id).first()
-    
-    if not comanda:
-        raise HTTPException(status_code=404, detail="Comanda não encontrada")
-    if comanda.status != "ABERTA":
-        raise HTTPException(status_code=400, detail="Comanda já está fechada!")
-    if item.preco_unitario < 0.0:
-        raise HTTPException(status_code=422, detail="Valor inválido.")
-    
-    db_item = ItemComanda(**item.model_dump())
-    db.add(db_item)
-    comanda.valor_total += (item.quantidade * item.preco_unitario)
-    
-    db.commit()
+def adicionar_item(item: ItemCreate, db: Session = Depends(get_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    def operacao(db):
+        comanda = repositorio.buscar_comanda(db, item.comanda_id)
+        
+        if not comanda:
+            raise HTTPException(status_code=404, detail="Comanda não encontrada")
+        if comanda.status != "ABERTA":
+            raise HTTPException(status_code=400, detail="Comanda já está fechada!")
+        if item.quantidade < 1:
+            raise HTTPException(status_code=422, detail="Quantidade inválida.")
+
+        # Nome e preço vêm do catálogo (cache em memória), nunca do cliente
+        produto = catalogo.obter(db, item.produto_id)
+        if not produto or not produto.ativo:
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+        
+        db_item = ItemComanda(
+            comanda_id=comanda.id,
+            produto_id=produto.id,
+            nome_produto=produto.nome,
+            quantidade=item.quantidade,
+            preco_unitario=produto.preco,
+        )
+        db.add(db_item)
+        comanda.valor_total += (item.quantidade * produto.preco)
+        return db_item
+
+    db_item = executar_transacao(db, operacao, "adicionar_item")
     db.refresh(db_item)
     return db_item
 
 # --- CHECKOUT (FECHAMENTO) ---
 @app.put("/comandas/{comanda_id}/checkout", response_model=ComandaResponse)
 def finalizar_comanda(comanda_id: int, db: Session = Depends(get_db)):
-    comanda = db.query(Comanda).filter(Comanda.id == comanda_id).first()
-    
-    if not comanda:
-        raise HTTPException(status_code=404, detail="Comanda não encontrada")
-    
-    if comanda.status != "ABERTA":
-        raise HTTPException(status_code=400, detail=f"Comanda já está {comanda.status}.")
+    def operacao(db):
+        comanda = repositorio.buscar_comanda(db, comanda_id)
+        
+        if not comanda:
+            raise HTTPException(status_code=404, detail="Comanda não encontrada")
+        
+        if comanda.status != "ABERTA":
+            raise HTTPException(status_code=400, detail=f"Comanda já está {comanda.status}.")
 
-    comanda.status = "PAGA"
-    db.commit()
+        comanda.status = "PAGA"
+        # O resto (recibo etc.) roda em segundo plano; o job é gravado no mesmo commit do pagamento
+        enfileirar(db, "gerar_recibo", {"comanda_id": comanda.id})
+        return comanda
+
+    comanda = executar_transacao(db, operacao, "finalizar_comanda")
     db.refresh(comanda)
+    pool.notificar()
     
     return comanda
 
+@app.get("/comandas/{comanda_id}/recibo", response_model=ReciboResponse)
+def ver_recibo(comanda_id: int, db: Session = Depends(get_read_db)):
+    recibo = repositorio.recibo_da_comanda(db, comanda_id)
+    if not recibo:
+        raise HTTPException(status_code=404, detail="Recibo não encontrado (ainda sendo gerado?)")
+    return recibo
+
 # --- ADMIN: DELETAR COMANDA ---
 @app.delete("/comandas/{comanda_id}")
 def deletar_comanda(comanda_id: int, db: Session = Depends(get_db)):
-    comanda = db.query(Comanda).filter(Comanda.id == comanda_id).first()
-    
-    if not comanda:
-        raise HTTPException(status_code=404, detail="Comanda não encontrada.")
-    
-    if comanda.status != "PAGA":
-        if comanda.valor_total > 0:
-            raise HTTPException(status_code=400, detail=f"Comanda {comanda.status} com valor pendente (R$ {comanda.valor_total:.2f}). Pague antes de deletar.")
+    def operacao(db):
+        comanda = repositorio.buscar_comanda(db, comanda_id)
+        
+        if not comanda:
+            raise HTTPException(status_code=404, detail="Comanda não encontrada.")
+        
+        if comanda.status != "PAGA":
+            if comanda.valor_total > 0:
+                raise HTTPException(status_code=400, detail=f"Comanda {comanda.status} com valor pendente (R$ {comanda.valor_total:.2f}). Pague antes de deletar.")
+
+        db.delete(comanda)
 
-    db.delete(comanda)
-    db.commit()
+    executar_transacao(db, operacao, "deletar_comanda")
     
     return {"message": f"Comanda {comanda_id} deletada com sucesso."}
 
+# --- ADMIN: FILA DE JOBS ---
+@app.get("/admin/jobs")
+def estatisticas_jobs(db: Session = Depends(get_read_db)):
+    return pool.estatisticas(db, tenant_atual.get())
+
+# --- ADMIN: CONTENÇÃO NAS ESCRITAS ---
+@app.get("/admin/transacoes")
+def estatisticas_transacoes():
+    return metricas_transacao.resumo()
+
 # --- ADMIN: LIMPEZA DO BANCO DE DADOS ---
 @app.post("/admin/reset-db")
-def reset_database():
-    from App.db.connection import engine, Base
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+def reset_database(db: Session = Depends(get_db), catalogo: CatalogoCache = Depends(get_catalogo)):
+    def operacao(db):
+        # DDL na conexão da sessão: no SQLite ela entra na mesma transação
+        conexao = db.connection()
+        Base.metadata.drop_all(bind=conexao)
+        Base.metadata.create_all(bind=conexao)
+
+    executar_transacao(db, operacao, "reset_db")
+    catalogo.invalidar()
     return {"message": "Database reset successful. All tables cleared."}
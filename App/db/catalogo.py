@@ -0,0 +1,77 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+from App.db import repositorio
+
+
+@dataclass(frozen=True)
+class ProdutoCache:
+    # Cópia imutável de uma linha de "produtos" (não fica presa a nenhuma sessão)
+    id: int
+    nome: str
+    preco: float
+    ativo: bool
+
+
+class CatalogoCache:
+    """
+    Cache em memória do catálogo de produtos.
+
+    O catálogo inteiro é carregado numa consulta só e depois cada preço vira
+    uma busca no dicionário. Toda escrita no catálogo chama `invalidar()`
+    (depois do commit), o que sobe a versão e força a próxima leitura a
+    recarregar. O cache vale só para este processo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versao = 0
+        self._carregado = None  # (versao, {id: ProdutoCache}, etag)
+
+    @property
+    def versao(self):
+        return self._versao
+
+    def invalidar(self):
+        with self._lock:
+            self._versao += 1
+            self._carregado = None
+
+    def _snapshot(self, db: Session):
+        carregado = self._carregado
+        if carregado is not None and carregado[0] == self._versao:
+            return carregado
+
+        versao = self._versao
+        produtos = {
+            p.id: ProdutoCache(id=p.id, nome=p.nome, preco=p.preco, ativo=p.ativo)
+            for p in repositorio.listar_produtos(db)
+        }
+        conteudo = json.dumps(
+            [[p.id, p.nome, p.preco, p.ativo] for p in produtos.values()],
+            ensure_ascii=False,
+        )
+        etag = '"' + hashlib.sha1(conteudo.encode()).hexdigest() + '"'
+        snapshot = (versao, produtos, etag)
+
+        with self._lock:
+            # Se alguém invalidou enquanto carregávamos, não guarda dado velho
+            if self._versao == versao:
+                self._carregado = snapshot
+        return snapshot
+
+    def obter(self, db: Session, produto_id: int):
+        """Produto do catálogo (ativo ou não), ou None se o id não existe."""
+        return self._snapshot(db)[1].get(produto_id)
+
+    def listar(self, db: Session):
+        """Produtos ativos e o ETag do catálogo atual."""
+        _, produtos, etag = self._snapshot(db)
+        return [p for p in produtos.values() if p.ativo], etag
+
+
+catalogo = CatalogoCache()
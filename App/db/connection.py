@@ -1,25 +1,98 @@
-from sqlalchemy import create_engine
+import os
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Define onde o arquivo do banco vai ficar (na raiz do projeto)
-DATABASE_URL = "sqlite:///./pesqueiro.db"
+DATABASE_PATH = "./pesqueiro.db"
+
+# Tamanho do pool de conexões só de leitura (rotas GET)
+READ_POOL_SIZE = 10
+READ_MAX_OVERFLOW = 20
+
+# Quanto o driver do SQLite espera sozinho por um lock antes de devolver
+# "database is locked" (depois disso quem tenta de novo é App/db/transacao.py)
+SQLITE_TIMEOUT = 1.0
+
+def _configurar_escrita(dbapi_connection, connection_record):
+    # WAL: leitores não bloqueiam o escritor (e vice-versa)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+    # Desliga o BEGIN automático do driver; quem abre a transação é _begin
+    dbapi_connection.isolation_level = None
 
-# Cria o motor de conexão (Engine)
+def _begin(conn):
+    if conn.get_execution_options().get("sqlite_imediata"):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+# Cria o motor de conexão (Engine) de escrita
 # check_same_thread=False é necessário apenas para o SQLite
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def criar_engine(caminho=DATABASE_PATH):
+    engine_escrita = create_engine(
+        f"sqlite:///{caminho}",
+        connect_args={"check_same_thread": False, "timeout": SQLITE_TIMEOUT},
+    )
+    event.listen(engine_escrita, "connect", _configurar_escrita)
+    event.listen(engine_escrita, "begin", _begin)
+    return engine_escrita
+
+engine = criar_engine()
+
+def _somente_leitura(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
 
-# Cria a sessão (é o que usaremos para mandar dados pro banco)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Motor só de leitura: abre o arquivo com mode=ro (URI) e query_only ligado
+def criar_engine_leitura(caminho=DATABASE_PATH, pool_size=READ_POOL_SIZE, max_overflow=READ_MAX_OVERFLOW):
+    url = f"sqlite:///file:{quote(os.path.abspath(caminho))}?mode=ro&uri=true"
+    engine_leitura = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+    event.listen(engine_leitura, "connect", _somente_leitura)
+    return engine_leitura
+
+read_engine = criar_engine_leitura()
+
+# Fábrica de sessões (é o que usaremos para mandar dados pro banco).
+# Cada pesqueiro cria as suas a partir dos próprios engines (App/db/tenants.py)
+def criar_sessoes(engine_escrita):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine_escrita)
+
+# Sessão de leitura: nunca faz flush/commit e não expira objetos
+def criar_sessoes_leitura(engine_leitura):
+    return sessionmaker(autoflush=False, expire_on_commit=False, bind=engine_leitura)
+
+# Abre a transação da sessão já com o lock de escrita (BEGIN IMMEDIATE).
+# Com o BEGIN normal o lock só é pedido no primeiro INSERT/UPDATE e, se outro
+# escritor tiver commitado depois da nossa leitura, o SQLite devolve
+# "database is locked" na hora, sem esperar. Chamar antes da primeira consulta.
+def iniciar_escrita(db):
+    db.connection(execution_options={"sqlite_imediata": True})
 
 # Essa é a classe "Mãe" de todas as tabelas
 Base = declarative_base()
 
-# Função auxiliar para pegar a conexão em cada requisição
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# get_db / get_read_db ficam em App/db/tenants.py (escolhem o banco do pesqueiro)
+
+# Cria as tabelas que faltam e adiciona colunas novas em tabelas que já existem
+# (o create_all sozinho não altera tabelas de um pesqueiro.db antigo)
+def criar_tabelas(bind=engine):
+    Base.metadata.create_all(bind=bind)
+
+    with bind.begin() as conn:
+        inspetor = inspect(conn)
+        for tabela in Base.metadata.sorted_tables:
+            existentes = {c["name"] for c in inspetor.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name in existentes:
+                    continue
+                tipo = coluna.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {tabela.name} ADD COLUMN "{coluna.name}" {tipo}'))
\ No newline at end of file
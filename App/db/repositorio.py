@@ -0,0 +1,69 @@
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from App.models.cliente import Cliente
+from App.models.comanda import Comanda
+from App.models.job import Job
+from App.models.produto import Produto
+from App.models.recibo import Recibo
+
+# Consultas das rotas mais usadas, num lugar só.
+#
+# - Busca por chave primária usa Session.get: se o objeto já está na sessão
+#   (identity map) não vai ao banco; se não está, o SELECT por id já sai
+#   compilado do cache do SQLAlchemy.
+# - As outras consultas são montadas uma vez, aqui no módulo, com bindparam
+#   no lugar dos valores (estilo "baked query"). Cada chamada só passa os
+#   parâmetros: não reconstrói o select() e reaproveita o SQL compilado.
+
+_LISTAR_CLIENTES = select(Cliente)
+
+_COMANDA_DO_CLIENTE = (
+    select(Comanda)
+    .where(Comanda.cliente_id == bindparam("cliente_id"))
+    .limit(1)
+)
+
+_LISTAR_PRODUTOS = select(Produto).order_by(Produto.id)
+
+_PRODUTO_POR_NOME = select(Produto).where(Produto.nome == bindparam("nome"))
+
+_RECIBO_DA_COMANDA = select(Recibo).where(Recibo.comanda_id == bindparam("comanda_id"))
+
+_JOB_EM_ABERTO = select(Job.id).where(Job.status.in_(("PENDENTE", "EXECUTANDO"))).limit(1)
+
+
+def buscar_cliente(db: Session, cliente_id: int):
+    return db.get(Cliente, cliente_id)
+
+
+def listar_clientes(db: Session):
+    return db.scalars(_LISTAR_CLIENTES).all()
+
+
+def buscar_comanda(db: Session, comanda_id: int):
+    return db.get(Comanda, comanda_id)
+
+
+def comanda_do_cliente(db: Session, cliente_id: int):
+    return db.scalars(_COMANDA_DO_CLIENTE, {"cliente_id": cliente_id}).first()
+
+
+def buscar_produto(db: Session, produto_id: int):
+    return db.get(Produto, produto_id)
+
+
+def produto_por_nome(db: Session, nome: str):
+    return db.scalars(_PRODUTO_POR_NOME, {"nome": nome}).first()
+
+
+def listar_produtos(db: Session):
+    return db.scalars(_LISTAR_PRODUTOS).all()
+
+
+def recibo_da_comanda(db: Session, comanda_id: int):
+    return db.scalars(_RECIBO_DA_COMANDA, {"comanda_id": comanda_id}).first()
+
+
+def tem_jobs_em_aberto(db: Session):
+    return db.scalar(_JOB_EM_ABERTO) is not None
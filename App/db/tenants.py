@@ -0,0 +1,191 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from starlette.responses import JSONResponse
+
+from App.db import connection, repositorio
+from App.db.catalogo import CatalogoCache, catalogo
+from App.db.connection import (
+    criar_engine,
+    criar_engine_leitura,
+    criar_sessoes,
+    criar_sessoes_leitura,
+    criar_tabelas,
+)
+
+# Cada pesqueiro (unidade) tem o seu próprio arquivo SQLite. O pesqueiro
+# "principal" é o pesqueiro.db de sempre; os outros ficam em PASTA_TENANTS.
+TENANT_PADRAO = "principal"
+TENANT_HEADER = "x-pesqueiro"   # Ex: X-Pesqueiro: represa-norte
+PREFIXO = "/u/"                 # Ex: /u/represa-norte/clientes
+PASTA_TENANTS = "./tenants"
+MAX_TENANTS_ABERTOS = 8         # Engines mantidos abertos (além do principal)
+
+_NOME_VALIDO = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+
+# Pesqueiro da requisição atual (definido pelo TenantMiddleware)
+tenant_atual = ContextVar("tenant_atual", default=TENANT_PADRAO)
+
+
+class Tenant:
+    """Engines, sessões e cache de catálogo de um pesqueiro."""
+
+    def __init__(self, nome, engine, read_engine, catalogo_cache):
+        self.nome = nome
+        self.engine = engine
+        self.read_engine = read_engine
+        self.SessionLocal = criar_sessoes(engine)
+        self.ReadSessionLocal = criar_sessoes_leitura(read_engine)
+        self.catalogo = catalogo_cache
+        self.pronto = False
+        self._lock = threading.Lock()
+
+    def preparar(self):
+        # Cria/migra o schema só no primeiro uso deste pesqueiro
+        if self.pronto:
+            return
+        with self._lock:
+            if not self.pronto:
+                criar_tabelas(self.engine)
+                self.pronto = True
+
+    def tem_jobs_em_aberto(self):
+        if not self.pronto:
+            return False
+        with self.ReadSessionLocal() as db:
+            return repositorio.tem_jobs_em_aberto(db)
+
+    def fechar(self):
+        self.engine.dispose()
+        self.read_engine.dispose()
+
+
+class CacheTenants:
+    """
+    LRU de pesqueiros abertos. Ao passar de `maximo`, o menos usado sai do
+    cache e tem os engines descartados (fecha as conexões ociosas). O
+    principal fica sempre aberto, fora da contagem.
+
+    Pesqueiro com job pendente ou em execução não é descartado (o cache pode
+    passar de `maximo` por um tempo); ele sai numa próxima abertura, depois
+    que os workers esvaziarem a fila dele.
+    """
+
+    def __init__(self, maximo=MAX_TENANTS_ABERTOS, pasta=PASTA_TENANTS):
+        self.maximo = maximo
+        self.pasta = pasta
+        self._lock = threading.Lock()
+        self._abertos = OrderedDict()
+        self._principal = Tenant(TENANT_PADRAO, connection.engine, connection.read_engine, catalogo)
+
+    def obter(self, nome=None):
+        nome = nome or tenant_atual.get()
+        if nome == TENANT_PADRAO:
+            tenant = self._principal
+        else:
+            tenant = self._obter_da_lru(nome)
+        tenant.preparar()
+        return tenant
+
+    def _obter_da_lru(self, nome):
+        despejados = []
+        with self._lock:
+            tenant = self._abertos.get(nome)
+            if tenant is not None:
+                self._abertos.move_to_end(nome)
+                return tenant
+
+            os.makedirs(self.pasta, exist_ok=True)
+            caminho = os.path.join(self.pasta, f"{nome}.db")
+            tenant = Tenant(nome, criar_engine(caminho), criar_engine_leitura(caminho), CatalogoCache())
+            self._abertos[nome] = tenant
+            for antigo in list(self._abertos.values()):
+                if len(self._abertos) <= self.maximo:
+                    break
+                # Quem tem job na fila fica: os workers só atendem pesqueiros abertos
+                if antigo is tenant or antigo.tem_jobs_em_aberto():
+                    continue
+                del self._abertos[antigo.nome]
+                despejados.append(antigo)
+
+        for antigo in despejados:
+            antigo.fechar()
+        return tenant
+
+    def abertos(self):
+        """Pesqueiros abertos e já preparados (usado pelos workers de jobs)."""
+        with self._lock:
+            todos = [self._principal, *self._abertos.values()]
+        return [tenant for tenant in todos if tenant.pronto]
+
+    def fechar_todos(self):
+        with self._lock:
+            abertos = list(self._abertos.values())
+            self._abertos.clear()
+        for tenant in abertos:
+            tenant.fechar()
+
+
+tenants = CacheTenants()
+
+
+# Funções auxiliares para pegar a conexão do pesqueiro da requisição
+def get_db():
+    db = tenants.obter().SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Mesma coisa para as rotas GET, usando o pool só de leitura
+def get_read_db():
+    db = tenants.obter().ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Cache do catálogo do pesqueiro da requisição (dependência, para que quem
+# substitui get_db/get_read_db também possa substituir o catálogo)
+def get_catalogo():
+    return tenants.obter().catalogo
+
+
+class TenantMiddleware:
+    """
+    Descobre o pesqueiro pelo prefixo /u/<nome>/ (que é removido do caminho)
+    ou pelo header X-Pesqueiro. Sem nenhum dos dois, usa o principal.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        nome = TENANT_PADRAO
+        caminho = scope["path"]
+        if caminho.startswith(PREFIXO):
+            nome, _, resto = caminho[len(PREFIXO):].partition("/")
+            scope = dict(scope, path="/" + resto, raw_path=("/" + resto).encode())
+        else:
+            for chave, valor in scope["headers"]:
+                if chave == TENANT_HEADER.encode():
+                    nome = valor.decode("latin-1").strip().lower()
+                    break
+
+        if not _NOME_VALIDO.match(nome):
+            resposta = JSONResponse({"detail": "Pesqueiro inválido."}, status_code=400)
+            await resposta(scope, receive, send)
+            return
+
+        token = tenant_atual.set(nome)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            tenant_atual.reset(token)
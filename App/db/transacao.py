@@ -0,0 +1,123 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from App.db.connection import iniciar_escrita
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo (segundos) que uma escrita fica tentando de novo com o banco ocupado
+PRAZO_PADRAO = 10.0
+
+# Classes de erro
+OCUPADO = "ocupado"          # SQLITE_BUSY / SQLITE_LOCKED: vale tentar de novo
+INTEGRIDADE = "integridade"  # UNIQUE, NOT NULL, FK...: tentar de novo não adianta
+OUTRO = "outro"
+
+_CODIGOS_OCUPADO = {5, 6}  # SQLITE_BUSY, SQLITE_LOCKED (código primário)
+
+
+def classificar_erro(exc):
+    if isinstance(exc, IntegrityError):
+        return INTEGRIDADE
+    if isinstance(exc, DBAPIError):
+        original = exc.orig
+        codigo = getattr(original, "sqlite_errorcode", None)
+        if codigo is not None and codigo & 0xFF in _CODIGOS_OCUPADO:
+            return OCUPADO
+        if isinstance(original, sqlite3.OperationalError):
+            mensagem = str(original).lower()
+            if "locked" in mensagem or "busy" in mensagem:
+                return OCUPADO
+    return OUTRO
+
+
+def atraso_retentativa(tentativa, base=0.01, teto=0.5):
+    """Backoff exponencial com jitter (segundos) para a tentativa `tentativa`."""
+    return min(teto, base * 2 ** tentativa) * random.uniform(0.5, 1.0)
+
+
+class MetricasTransacao:
+    """Contadores por rota: tentativas, esperas por lock, retentativas e falhas."""
+
+    CAMPOS = ("commits", "esperas_lock", "retentativas", "tempo_espera_s",
+              "desistencias", "conflitos_integridade", "erros")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rotas = defaultdict(lambda: dict.fromkeys(self.CAMPOS, 0))
+
+    def somar(self, rota, campo, valor=1):
+        with self._lock:
+            self._rotas[rota][campo] += valor
+
+    def resumo(self):
+        with self._lock:
+            return {rota: dict(valores) for rota, valores in self._rotas.items()}
+
+    def zerar(self):
+        with self._lock:
+            self._rotas.clear()
+
+
+metricas = MetricasTransacao()
+
+
+def executar_transacao(db: Session, operacao, rota, erro_integridade="Erro de integridade.",
+                       prazo=PRAZO_PADRAO, imediata=True):
+    """
+    Roda `operacao(db)` e faz commit, tentando de novo enquanto o SQLite
+    estiver ocupado (até `prazo` segundos). A operação pode rodar mais de uma
+    vez, então ela deve buscar no banco tudo o que precisa.
+
+    Com `imediata=False` a transação não começa com BEGIN IMMEDIATE: o lock de
+    escrita só é pego na primeira escrita (no flush do commit), então uma
+    operação demorada que mais lê do que escreve não trava as outras escritas.
+
+    - HTTPException levantada pela operação: rollback e repassa.
+    - Violação de integridade: vira 400 com `erro_integridade`.
+    - Banco ocupado depois do prazo: 503.
+    - Qualquer outro erro: rollback e repassa (500).
+    """
+    limite = time.monotonic() + prazo
+    tentativa = 0
+    while True:
+        try:
+            if imediata:
+                iniciar_escrita(db)
+            resultado = operacao(db)
+            db.commit()
+            metricas.somar(rota, "commits")
+            return resultado
+        except HTTPException:
+            db.rollback()
+            raise
+        except Exception as exc:
+            db.rollback()
+            tipo = classificar_erro(exc)
+
+            if tipo == INTEGRIDADE:
+                metricas.somar(rota, "conflitos_integridade")
+                raise HTTPException(status_code=400, detail=erro_integridade)
+            if tipo == OUTRO:
+                metricas.somar(rota, "erros")
+                raise
+
+            metricas.somar(rota, "esperas_lock")
+            atraso = atraso_retentativa(tentativa)
+            if time.monotonic() + atraso > limite:
+                metricas.somar(rota, "desistencias")
+                logger.warning("%s: banco ocupado depois de %d tentativas", rota, tentativa + 1)
+                raise HTTPException(status_code=503, detail="Banco de dados ocupado, tente novamente.")
+
+            time.sleep(atraso)
+            tentativa += 1
+            metricas.somar(rota, "retentativas")
+            metricas.somar(rota, "tempo_espera_s", atraso)
@@ -0,0 +1,341 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from App.db.tenants import tenants
+from App.db.transacao import executar_transacao
+from App.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Handlers registrados com @tarefa("nome"). Um job pode rodar mais de uma vez
+# (retentativa ou queda do processo no meio da execução), então todo handler
+# precisa ser idempotente.
+HANDLERS = {}
+
+# Tempo (segundos) que um job pode ficar EXECUTANDO antes de outro worker
+# considerar a reserva perdida e rodá-lo de novo
+PRAZO_EXECUCAO = 600.0
+
+
+def tarefa(nome):
+    """Registra a função decorada como handler dos jobs do tipo `nome`."""
+    def decorator(funcao):
+        HANDLERS[nome] = funcao
+        return funcao
+    return decorator
+
+
+def agora():
+    # UTC sem timezone: é assim que o SQLite devolve as colunas DateTime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def backoff(tentativa, base=1.0, teto=300.0):
+    """Atraso (segundos) antes da próxima tentativa: exponencial com jitter."""
+    atraso = min(teto, base * 2 ** max(tentativa - 1, 0))
+    return atraso * random.uniform(0.5, 1.0)
+
+
+def enfileirar(db: Session, tipo: str, payload=None, max_tentativas=5):
+    """
+    Adiciona um job na sessão de quem chamou. Ele só passa a existir quando
+    essa transação fizer commit, junto com a mudança de estado que o originou.
+    """
+    momento = agora()
+    job = Job(
+        tipo=tipo,
+        payload=json.dumps(payload or {}),
+        status="PENDENTE",
+        tentativas=0,
+        max_tentativas=max_tentativas,
+        criado_em=momento,
+        executar_em=momento,
+    )
+    db.add(job)
+    return job
+
+
+class WorkerPool:
+    """
+    Pool de threads que consome a tabela `jobs`.
+
+    Cada worker reserva um job com um UPDATE condicional (status PENDENTE ->
+    EXECUTANDO), então vários workers podem disputar a mesma fila sem executar
+    o mesmo job em paralelo. Reserva, execução e registro de falha passam por
+    `executar_transacao`, que tenta de novo se o banco estiver ocupado.
+
+    Sem `session_factory`, o pool percorre as filas de todos os pesqueiros
+    abertos no momento. Um pesqueiro com jobs na fila não sai do cache
+    (ver CacheTenants), então nenhum job fica parado esperando ele reabrir.
+    """
+
+    def __init__(self, session_factory=None, workers=2, intervalo=1.0, prazo_execucao=PRAZO_EXECUCAO):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.intervalo = intervalo  # Espera máxima entre consultas com a fila vazia
+        self.prazo_execucao = prazo_execucao
+
+        self._threads = []
+        self._recuperados = set()
+        self._lock_recuperacao = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        # Latência e falhas por fila (nome do pesqueiro; "" com session_factory)
+        self._metricas = defaultdict(lambda: {
+            "executados": 0,
+            "falhas": 0,
+            "retentativas": 0,
+            "espera_total": 0.0,
+            "espera_max": 0.0,
+            "duracao_total": 0.0,
+            "duracao_max": 0.0,
+        })
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self):
+        if self._threads:
+            return
+        self._parar.clear()
+        for numero in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{numero}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def parar(self, timeout=5.0):
+        self._parar.set()
+        self._acordar.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notificar(self):
+        """Acorda os workers logo depois de um commit que enfileirou jobs."""
+        self._acordar.set()
+
+    def _fontes(self):
+        if self.session_factory is not None:
+            return [("", self.session_factory)]
+        return [(tenant.nome, tenant.SessionLocal) for tenant in tenants.abertos()]
+
+    def recuperar_interrompidos(self, session_factory):
+        # Jobs que ficaram EXECUTANDO quando o processo caiu voltam para a fila.
+        # Roda uma vez por fila, antes do primeiro job dela neste processo.
+        db = session_factory()
+        try:
+            executar_transacao(
+                db,
+                lambda db: db.execute(
+                    update(Job)
+                    .where(Job.status == "EXECUTANDO")
+                    .values(status="PENDENTE", executar_em=agora())
+                ),
+                "job:recuperar",
+            )
+        finally:
+            db.close()
+
+    def _recuperar_uma_vez(self, nome, session_factory):
+        # Verificar, recuperar e marcar precisa ser atômico: senão um segundo
+        # worker passaria pelo "not in" e devolveria para a fila o job que o
+        # primeiro já reservou e está executando
+        if nome in self._recuperados:
+            return
+        with self._lock_recuperacao:
+            if nome not in self._recuperados:
+                self.recuperar_interrompidos(session_factory)
+                self._recuperados.add(nome)
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                executou = self.processar_proximo()
+            except Exception:
+                logger.exception("Erro inesperado no worker de jobs")
+                executou = False
+            if not executou:
+                self._acordar.wait(self.intervalo)
+                self._acordar.clear()
+
+    # --- EXECUÇÃO ---
+    def processar_pendentes(self):
+        """Executa, na thread atual, todos os jobs prontos. Devolve quantos rodaram."""
+        total = 0
+        while self.processar_proximo():
+            total += 1
+        return total
+
+    def processar_proximo(self):
+        for nome, session_factory in self._fontes():
+            self._recuperar_uma_vez(nome, session_factory)
+            if self._processar_proximo_em(nome, session_factory):
+                return True
+        return False
+
+    def _processar_proximo_em(self, fila, session_factory):
+        db = session_factory()
+        try:
+            job = self._reservar(db)
+            if job is None:
+                return False
+            self._executar(db, job, fila)
+            return True
+        finally:
+            db.close()
+
+    def _reservar(self, db: Session):
+        while True:
+            # Leitura simples: fila vazia não pega o lock de escrita.
+            # EXECUTANDO há mais de `prazo_execucao`: o worker que o reservou
+            # caiu ou não conseguiu registrar o resultado; o job volta a rodar.
+            momento = agora()
+            candidato = db.execute(
+                select(Job.id, Job.tentativas)
+                .where(or_(
+                    and_(Job.status == "PENDENTE", Job.executar_em <= momento),
+                    and_(
+                        Job.status == "EXECUTANDO",
+                        Job.iniciado_em <= momento - timedelta(seconds=self.prazo_execucao),
+                    ),
+                ))
+                .order_by(Job.executar_em, Job.id)
+                .limit(1)
+            ).first()
+            db.rollback()
+            if candidato is None:
+                return None
+
+            # A reserva em si é uma transação curta (BEGIN IMMEDIATE + UPDATE).
+            # `tentativas` sobe a cada reserva: se mudou, outro worker chegou antes.
+            def operacao(db, job_id=candidato.id, tentativas=candidato.tentativas):
+                resultado = db.execute(
+                    update(Job)
+                    .where(
+                        Job.id == job_id,
+                        Job.tentativas == tentativas,
+                        Job.status.in_(("PENDENTE", "EXECUTANDO")),
+                    )
+                    .values(status="EXECUTANDO", iniciado_em=agora(), tentativas=Job.tentativas + 1)
+                )
+                return resultado.rowcount == 1
+
+            try:
+                reservado = executar_transacao(db, operacao, "job:reservar")
+            except HTTPException:
+                logger.warning("Banco ocupado ao reservar o job %s; fica para a próxima", candidato.id)
+                return None
+            if reservado:
+                return db.get(Job, candidato.id)
+            # Outro worker pegou esse job primeiro; tenta o próximo
+
+    def _executar(self, db: Session, job: Job, fila=""):
+        job_id, tipo = job.id, job.tipo
+        payload = json.loads(job.payload or "{}")
+        tentativa = job.tentativas  # Identifica esta reserva (ver _reservar)
+        # Espera desde que o job ficou pronto (não conta o backoff da retentativa)
+        espera = (job.iniciado_em - job.executar_em).total_seconds()
+        inicio = time.perf_counter()
+
+        def concluir(db):
+            handler = HANDLERS.get(tipo)
+            if handler is None:
+                raise LookupError(f"Nenhum handler registrado para '{tipo}'")
+            handler(db, **payload)
+
+            # O efeito do handler e a conclusão do job entram no mesmo commit
+            job = db.get(Job, job_id)
+            if job.tentativas != tentativa:
+                return  # Passou do prazo e outro worker reservou de novo: o status é dele
+            job.status = "CONCLUIDO"
+            job.erro = None
+            job.concluido_em = agora()
+
+        def registrar_erro(db, erro):
+            job = db.get(Job, job_id)
+            if job.tentativas != tentativa:
+                return None
+            job.erro = erro
+            if job.tentativas >= job.max_tentativas:
+                job.status = "FALHOU"
+                job.concluido_em = agora()
+            else:
+                job.status = "PENDENTE"
+                job.executar_em = agora() + timedelta(seconds=backoff(job.tentativas))
+            return job.status
+
+        try:
+            # Sem BEGIN IMMEDIATE: o lock de escrita só é pego no commit, então
+            # as escritas da API não ficam na fila esperando o handler terminar
+            executar_transacao(db, concluir, f"job:{tipo}", imediata=False)
+        except Exception as exc:
+            erro = repr(exc)
+            try:
+                status = executar_transacao(db, lambda db: registrar_erro(db, erro), "job:falha")
+            except HTTPException:
+                # Continua EXECUTANDO; depois de `prazo_execucao` outro ciclo reserva de novo
+                logger.warning("Job %s (%s) falhou e o banco está ocupado; será retomado: %r", job_id, tipo, exc)
+                self._registrar_falha(fila, True)
+                return
+            if status is None:
+                return
+            if status == "FALHOU":
+                logger.error("Job %s (%s) falhou de vez: %r", job_id, tipo, exc)
+            else:
+                logger.warning("Job %s (%s) falhou, nova tentativa agendada: %r", job_id, tipo, exc)
+            self._registrar_falha(fila, status == "PENDENTE")
+        else:
+            self._registrar(fila, espera, time.perf_counter() - inicio)
+
+    # --- OBSERVABILIDADE ---
+    def _registrar(self, fila, espera, duracao):
+        with self._lock:
+            m = self._metricas[fila]
+            m["executados"] += 1
+            m["espera_total"] += espera
+            m["espera_max"] = max(m["espera_max"], espera)
+            m["duracao_total"] += duracao
+            m["duracao_max"] = max(m["duracao_max"], duracao)
+
+    def _registrar_falha(self, fila, vai_tentar_de_novo):
+        with self._lock:
+            m = self._metricas[fila]
+            m["falhas"] += 1
+            if vai_tentar_de_novo:
+                m["retentativas"] += 1
+
+    def estatisticas(self, db: Session, fila=""):
+        """
+        Profundidade da fila (por status) e latência dos jobs executados, da
+        mesma fila: `db` deve ser uma sessão do pesqueiro `fila`.
+        """
+        por_status = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        with self._lock:
+            m = dict(self._metricas[fila])
+        executados = m["executados"]
+        return {
+            "workers_ativos": len(self._threads),
+            "fila": {
+                status: por_status.get(status, 0)
+                for status in ("PENDENTE", "EXECUTANDO", "CONCLUIDO", "FALHOU")
+            },
+            "executados": executados,
+            "falhas": m["falhas"],
+            "retentativas": m["retentativas"],
+            "espera_media_s": m["espera_total"] / executados if executados else 0.0,
+            "espera_max_s": m["espera_max"],
+            "duracao_media_s": m["duracao_total"] / executados if executados else 0.0,
+            "duracao_max_s": m["duracao_max"],
+        }
+
+
+# Pool usado pela API (iniciado/parado no lifespan do FastAPI); atende todos os pesqueiros
+pool = WorkerPool()
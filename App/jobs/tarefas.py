@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+
+from App.db import repositorio
+from App.jobs.fila import agora, tarefa
+from App.models.recibo import Recibo
+
+
+@tarefa("gerar_recibo")
+def gerar_recibo(db: Session, comanda_id: int):
+    comanda = repositorio.buscar_comanda(db, comanda_id)
+    if comanda is None:
+        return  # Comanda deletada antes do job rodar: nada a fazer
+
+    # Upsert: rodar de novo só reescreve o mesmo recibo
+    recibo = repositorio.recibo_da_comanda(db, comanda_id)
+    if recibo is None:
+        recibo = Recibo(comanda_id=comanda_id)
+        db.add(recibo)
+
+    recibo.cliente_id = comanda.cliente_id
+    recibo.valor_total = comanda.valor_total
+    recibo.descricao = "\n".join(
+        f"{item.quantidade}x {item.nome_produto} - R$ {item.quantidade * item.preco_unitario:.2f}"
+        for item in comanda.itens
+    )
+    recibo.emitido_em = agora()
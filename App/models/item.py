@@ -7,7 +7,9 @@ class ItemComanda(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     comanda_id = Column(Integer, ForeignKey("comandas.id")) # Link com a Comanda
+    produto_id = Column(Integer, ForeignKey("produtos.id")) # Link com o catálogo
     
+    # Cópia do catálogo no momento da venda (mudar o preço não altera comandas antigas)
     nome_produto = Column(String) # Ex: "Cerveja", "Tilápia KG"
     quantidade = Column(Integer)
     preco_unitario = Column(Float)
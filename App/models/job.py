@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from App.db.connection import Base
+
+class Job(Base):
+    # Fila persistente de tarefas em segundo plano (ver App/jobs/fila.py)
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String, nullable=False)        # Nome do handler (ex: "gerar_recibo")
+    payload = Column(Text, default="{}")         # Argumentos do handler em JSON
+
+    # PENDENTE -> EXECUTANDO -> CONCLUIDO (ou FALHOU depois de esgotar as tentativas)
+    status = Column(String, default="PENDENTE", index=True)
+    tentativas = Column(Integer, default=0)
+    max_tentativas = Column(Integer, default=5)
+    erro = Column(Text)
+
+    # Datas em UTC (sem timezone, para comparar direto no SQLite)
+    criado_em = Column(DateTime, nullable=False)
+    executar_em = Column(DateTime, nullable=False, index=True)  # Próxima tentativa (backoff)
+    iniciado_em = Column(DateTime)
+    concluido_em = Column(DateTime)
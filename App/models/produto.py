@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean
+from App.db.connection import Base
+
+class Produto(Base):
+    __tablename__ = "produtos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nome = Column(String, unique=True, nullable=False)  # Ex: "Cerveja", "Tilápia KG"
+    preco = Column(Float, nullable=False)
+    # Produto "deletado" só sai do catálogo: os itens antigos continuam apontando pra ele
+    ativo = Column(Boolean, default=True, nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Float, Text, DateTime
+from App.db.connection import Base
+
+class Recibo(Base):
+    __tablename__ = "recibos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Sem ForeignKey: o recibo continua existindo mesmo depois que a comanda paga é deletada
+    comanda_id = Column(Integer, unique=True, index=True)
+    cliente_id = Column(Integer)
+
+    valor_total = Column(Float)
+    descricao = Column(Text)     # Uma linha por item consumido
+    emitido_em = Column(DateTime)
@@ -1,13 +1,19 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class ItemCreate(BaseModel):
     comanda_id: int
-    nome_produto: str
+    produto_id: int
     quantidade: int
-    preco_unitario: float
 
-class ItemResponse(ItemCreate):
+class ItemResponse(BaseModel):
     id: int
+    comanda_id: int
+    produto_id: Optional[int] = None  # Itens antigos (antes do catálogo) não têm produto
+    # Nome e preço copiados do catálogo no momento do lançamento
+    nome_produto: str
+    quantidade: int
+    preco_unitario: float
     
     class Config:
         from_attributes = True
\ No newline at end of file
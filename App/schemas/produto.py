@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class ProdutoBase(BaseModel):
+    nome: str
+    preco: float
+
+class ProdutoCreate(ProdutoBase):
+    pass
+
+class ProdutoUpdate(BaseModel):
+    nome: Optional[str] = None
+    preco: Optional[float] = None
+    ativo: Optional[bool] = None
+
+class ProdutoResponse(ProdutoBase):
+    id: int
+    ativo: bool
+
+    class Config:
+        from_attributes = True
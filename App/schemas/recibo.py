@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class ReciboResponse(BaseModel):
+    comanda_id: int
+    cliente_id: int
+    valor_total: float
+    descricao: str
+    emitido_em: datetime
+
+    class Config:
+        from_attributes = True
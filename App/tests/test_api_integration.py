@@ -1,10 +1,13 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 
-from App.api.main import app, get_db
-from App.db.connection import Base
+from App.api.main import app, get_catalogo, get_db, get_read_db
+from App.db.catalogo import CatalogoCache
+from App.db.connection import Base, criar_engine_leitura
+from App.models.cliente import Cliente
 
 # 1. Configura um Banco de Dados de Teste (arquivo, mas limpando antes)
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -33,9 +36,20 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+# Catálogo próprio: o do pesqueiro principal apontaria para o pesqueiro.db
+catalogo_teste = CatalogoCache()
+app.dependency_overrides[get_catalogo] = lambda: catalogo_teste
 
 client = TestClient(app)
 
+
+def criar_produto(nome, preco):
+    # Os itens agora apontam para um produto do catálogo
+    response = client.post("/produtos", json={"nome": nome, "preco": preco})
+    assert response.status_code == 200
+    return response.json()["id"]
+
 # --- OS TESTES COMEÇAM AQUI ---
 
 
@@ -72,9 +86,8 @@ def test_fluxo_completo_pesqueiro():
     # 3. Lançar Item (2 Cervejas a R$ 10,00)
     item_payload = {
         "comanda_id": comanda_id,
-        "nome_produto": "Cerveja Teste",
-        "quantidade": 2,
-        "preco_unitario": 10.0
+        "produto_id": criar_produto("Cerveja Teste", 10.0),
+        "quantidade": 2
     }
     response = client.post("/itens", json=item_payload)
     assert response.status_code == 200
@@ -110,9 +123,8 @@ def test_fechar_comanda_fechada():
     # 3. Adicionamos um item
     item_teste = {
         "comanda_id": comanda_id,
-        "nome_produto": "Agua Teste",
-        "quantidade": 3,
-        "preco_unitario": 2.0
+        "produto_id": criar_produto("Agua Teste", 2.0),
+        "quantidade": 3
     }
     response = client.post("/itens", json=item_teste)
     assert response.status_code == 200
@@ -236,9 +248,8 @@ def test_adicionar_item_sucesso():
     # Adicionar item
     item_payload = {
         "comanda_id": comanda_id,
-        "nome_produto": "Refri",
-        "quantidade": 1,
-        "preco_unitario": 5.50
+        "produto_id": criar_produto("Refri", 5.50),
+        "quantidade": 1
     }
     response_item = client.post("/itens", json=item_payload)
     assert response_item.status_code == 200
@@ -256,9 +267,8 @@ def test_adicionar_item_comanda_invalida():
     # Teste falso: adicionar item para uma comanda que não existe
     item_payload = {
         "comanda_id": 9999,
-        "nome_produto": "Cerveja",
-        "quantidade": 1,
-        "preco_unitario": 8.00
+        "produto_id": criar_produto("Cerveja", 8.00),
+        "quantidade": 1
     }
     response = client.post("/itens", json=item_payload)
     assert response.status_code == 404
@@ -288,9 +298,8 @@ def test_fechar_comanda_sucesso():
         "/itens",
         json={
             "comanda_id": comanda_id,
-            "nome_produto": "Suco",
-            "quantidade": 1,
-            "preco_unitario": 4.00
+            "produto_id": criar_produto("Suco", 4.00),
+            "quantidade": 1
         }
     )
 
@@ -305,9 +314,8 @@ def test_fechar_comanda_sucesso():
         "/itens",
         json={
             "comanda_id": comanda_id,
-            "nome_produto": "Água",
-            "quantidade": 1,
-            "preco_unitario": 3.00
+            "produto_id": criar_produto("Água", 3.00),
+            "quantidade": 1
         }
     )
     assert response_item.status_code in (400, 403)
@@ -336,27 +344,24 @@ def test_valor_total_com_multiple_itens():
         "/itens",
         json={
             "comanda_id": comanda_id,
-            "nome_produto": "Espaguete",
-            "quantidade": 1,
-            "preco_unitario": 12.0
+            "produto_id": criar_produto("Espaguete", 12.0),
+            "quantidade": 1
         }
     )
     client.post(
         "/itens",
         json={
             "comanda_id": comanda_id,
-            "nome_produto": "Salada",
-            "quantidade": 1,
-            "preco_unitario": 6.5
+            "produto_id": criar_produto("Salada", 6.5),
+            "quantidade": 1
         }
     )
     client.post(
         "/itens",
         json={
             "comanda_id": comanda_id,
-            "nome_produto": "Sobremesa",
-            "quantidade": 1,
-            "preco_unitario": 4.0
+            "produto_id": criar_produto("Sobremesa", 4.0),
+            "quantidade": 1
         }
     )
 
@@ -381,7 +386,10 @@ def test_cliente_nao_existente_comanda():
 
 
 def test_item_preco_negativo():
-    # Teste falso: não permitir item com preço negativo
+    # Teste falso: não permitir produto com preço negativo nem item com quantidade inválida
+    resp = client.post("/produtos", json={"nome": "Negativo", "preco": -5.0})
+    assert resp.status_code == 422
+
     response_cliente = client.post(
         "/clientes",
         json={
@@ -400,9 +408,8 @@ def test_item_preco_negativo():
 
     item_payload = {
         "comanda_id": comanda_id,
-        "nome_produto": "Negativo",
-        "quantidade": 1,
-        "preco_unitario": -5.0
+        "produto_id": criar_produto("Quantidade Zero", 5.0),
+        "quantidade": 0
     }
     resp = client.post("/itens", json=item_payload)
     assert resp.status_code == 422
@@ -438,3 +445,92 @@ def test_buscar_cliente_inexistente():
     resp = client.get("/clientes/9999")
     assert resp.status_code == 404
     # assert "não encontrado" in resp.json()["detail"].lower()
+
+
+def test_preco_do_item_vem_do_catalogo():
+    produto_id = criar_produto("Tilápia KG", 30.0)
+
+    cid = client.post(
+        "/clientes",
+        json={"nome": "Catalogo", "cpf": "22233344455", "telefone": "", "email": ""}
+    ).json()["id"]
+    comanda_id = client.post("/comandas", json={"cliente_id": cid}).json()["id"]
+
+    # Preço mandado pelo cliente é ignorado
+    resp = client.post(
+        "/itens",
+        json={"comanda_id": comanda_id, "produto_id": produto_id, "quantidade": 1, "preco_unitario": 0.01}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["preco_unitario"] == 30.0
+    assert resp.json()["nome_produto"] == "Tilápia KG"
+
+    # Alterar o catálogo invalida o cache: o próximo item já sai com o preço novo
+    assert client.put(f"/produtos/{produto_id}", json={"preco": 35.0}).status_code == 200
+    resp = client.post("/itens", json={"comanda_id": comanda_id, "produto_id": produto_id, "quantidade": 2})
+    assert resp.json()["preco_unitario"] == 35.0
+
+    resp = client.get(f"/comandas/{comanda_id}")
+    assert resp.json()["valor_total"] == pytest.approx(100.0)
+
+    # Produto removido não pode mais ser lançado
+    assert client.delete(f"/produtos/{produto_id}").status_code == 200
+    resp = client.post("/itens", json={"comanda_id": comanda_id, "produto_id": produto_id, "quantidade": 1})
+    assert resp.status_code == 404
+
+
+def test_recriar_produto_removido():
+    produto_id = criar_produto("Chopp", 12.0)
+    assert client.delete(f"/produtos/{produto_id}").status_code == 200
+
+    # Mesmo nome de novo: volta ao catálogo com o preço novo, mesmo id
+    resp = client.post("/produtos", json={"nome": "Chopp", "preco": 14.0})
+    assert resp.status_code == 200
+    assert resp.json() == {"id": produto_id, "nome": "Chopp", "preco": 14.0, "ativo": True}
+
+    # Produto ativo continua sem duplicar
+    assert client.post("/produtos", json={"nome": "Chopp", "preco": 15.0}).status_code == 400
+
+    # Também dá para reativar pelo PUT
+    assert client.delete(f"/produtos/{produto_id}").status_code == 200
+    resp = client.put(f"/produtos/{produto_id}", json={"ativo": True})
+    assert resp.status_code == 200
+    assert resp.json()["ativo"] is True
+    assert "Chopp" in [p["nome"] for p in client.get("/produtos").json()]
+
+
+def test_catalogo_com_etag():
+    resp = client.get("/produtos")
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+
+    # Catálogo igual: 304 sem corpo
+    resp = client.get("/produtos", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    # Validador fraco, lista de ETags e "*" também revalidam
+    for cabecalho in (f"W/{etag}", f'"outro", {etag}', "*"):
+        resp = client.get("/produtos", headers={"If-None-Match": cabecalho})
+        assert resp.status_code == 304
+
+    # Catálogo mudou: ETag novo
+    criar_produto("Minhoca", 3.0)
+    resp = client.get("/produtos", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert "Minhoca" in [p["nome"] for p in resp.json()]
+
+
+def test_engine_de_leitura_nao_escreve():
+    # Linha própria, gravada pelo engine de escrita (não depende dos outros testes)
+    db = TestingSessionLocal()
+    db.add(Cliente(nome="Leitura", cpf="90909090909", telefone="", email=""))
+    db.commit()
+    db.close()
+
+    engine_leitura = criar_engine_leitura("./test.db", pool_size=1, max_overflow=0)
+    with engine_leitura.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM clientes")).scalar() > 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM clientes"))
+    engine_leitura.dispose()
@@ -0,0 +1,134 @@
+import gzip
+import os
+import re
+import threading
+
+import brotli
+import pytest
+from fastapi.testclient import TestClient
+
+from App.api import main
+from App.api.main import app
+from App.web import assets
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def frontend_gerado():
+    # O dist/ fica fora do git: gera aqui, como o `task front` faz
+    assets.construir()
+
+
+def urls_dos_assets(html):
+    return re.findall(r'"(/app/static/[^"]+)"', html)
+
+
+def test_pagina_aponta_para_assets_com_hash():
+    resp = client.get("/app/")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/html")
+    assert resp.headers["cache-control"] == "no-cache"
+
+    urls = urls_dos_assets(resp.text)
+    assert len(urls) == 2
+    assert all(re.search(r"app\.[0-9a-f]{12}\.(css|js)$", url) for url in urls)
+
+    # Revalidação: mesma versão -> 304
+    etag = resp.headers["etag"]
+    resp = client.get("/app/", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    resp = client.get("/app/", headers={"If-None-Match": f'W/"antigo", W/{etag}'})
+    assert resp.status_code == 304
+
+
+def test_asset_pre_comprimido_e_imutavel():
+    url = [u for u in urls_dos_assets(client.get("/app/").text) if u.endswith(".js")][0]
+
+    resp = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["cache-control"] == assets.CACHE_IMUTAVEL
+    assert "Accept-Encoding" in resp.headers["vary"]
+
+    resp_br = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert resp_br.headers["content-encoding"] == "br"
+
+    sem_compressao = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sem_compressao.headers
+
+    # Cada codificação tem o seu ETag forte
+    etags = {r.headers["etag"] for r in (resp, resp_br, sem_compressao)}
+    assert len(etags) == 3
+    revalidado = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["etag"]})
+    assert revalidado.status_code == 304
+    outra_codificacao = client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": resp.headers["etag"]})
+    assert outra_codificacao.status_code == 200
+    assert sem_compressao.text == resp.text
+    assert "listarClientes" in sem_compressao.text
+
+
+def test_asset_inexistente():
+    assert client.get("/app/static/../../main.py").status_code == 404
+    assert client.get("/app/static/app.000000000000.js").status_code == 404
+
+
+def test_frontend_nao_gerado_vira_503(tmp_path, monkeypatch):
+    carregar = assets.carregar
+    monkeypatch.setattr(main, "manifesto_frontend", None)
+    monkeypatch.setattr(assets, "carregar", lambda: carregar(destino=str(tmp_path)))
+
+    resp = client.get("/app/")
+    assert resp.status_code == 503
+    assert "task front" in resp.json()["detail"]
+
+    # O resto da API não depende do frontend
+    assert client.get("/").status_code == 200
+
+
+def test_json_grande_sai_com_gzip():
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+
+    # Resposta pequena não é comprimida
+    resp = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+
+
+def test_construir_e_carregar(tmp_path):
+    manifesto = assets.construir(destino=str(tmp_path))
+    for entrada in manifesto["assets"].values():
+        original = (tmp_path / entrada["arquivo"]).read_bytes()
+        comprimido = (tmp_path / entrada["codificacoes"]["gzip"]).read_bytes()
+        assert gzip.decompress(comprimido) == original
+        assert brotli.decompress((tmp_path / entrada["codificacoes"]["br"]).read_bytes()) == original
+
+    assert assets.carregar(destino=str(tmp_path)) == manifesto
+
+    # Sem build, a API não gera nada sozinha: falha avisando o que fazer
+    with pytest.raises(RuntimeError, match="task front"):
+        assets.carregar(destino=str(tmp_path / "vazia"))
+    assert not (tmp_path / "vazia").exists()
+
+
+def test_construir_em_paralelo(tmp_path):
+    # Vários workers do uvicorn (ou deploys) gerando ao mesmo tempo
+    erros = []
+
+    def gerar():
+        try:
+            assets.construir(destino=str(tmp_path))
+        except Exception as exc:
+            erros.append(exc)
+
+    threads = [threading.Thread(target=gerar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    manifesto = assets.carregar(destino=str(tmp_path))
+    for entrada in [manifesto["pagina"], *manifesto["assets"].values()]:
+        assert (tmp_path / entrada["arquivo"]).exists()
+    assert not [nome for nome in os.listdir(tmp_path) if nome.startswith(".")]
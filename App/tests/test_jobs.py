@@ -0,0 +1,287 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import App.jobs.fila as modulo_fila
+from App.api.main import app, get_catalogo, get_db, get_read_db
+from App.db.catalogo import CatalogoCache
+from App.db.connection import Base, criar_engine
+from App.db.transacao import executar_transacao
+from App.jobs.fila import WorkerPool, enfileirar, tarefa
+from App.jobs.tarefas import gerar_recibo
+from App.models.job import Job
+from App.models.recibo import Recibo
+
+# Banco em memória só para os testes da fila
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def banco_limpo():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Cada teste começa com o catálogo (cache do processo) vazio
+    catalogo_teste = CatalogoCache()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    anteriores = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_catalogo] = lambda: catalogo_teste
+    yield
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(anteriores)
+
+
+def abrir_comanda_com_item():
+    cliente_id = client.post(
+        "/clientes",
+        json={"nome": "Fila", "cpf": "10101010101", "telefone": "", "email": ""}
+    ).json()["id"]
+    comanda_id = client.post("/comandas", json={"cliente_id": cliente_id}).json()["id"]
+    produto_id = client.post("/produtos", json={"nome": "Isca", "preco": 7.5}).json()["id"]
+    client.post(
+        "/itens",
+        json={"comanda_id": comanda_id, "produto_id": produto_id, "quantidade": 2}
+    )
+    return comanda_id
+
+
+def test_checkout_enfileira_recibo():
+    comanda_id = abrir_comanda_com_item()
+
+    response = client.put(f"/comandas/{comanda_id}/checkout")
+    assert response.status_code == 200
+    assert response.json()["status"] == "PAGA"
+
+    # O checkout só grava o job; o recibo ainda não existe
+    assert client.get(f"/comandas/{comanda_id}/recibo").status_code == 404
+    assert client.get("/admin/jobs").json()["fila"]["PENDENTE"] == 1
+
+    workers = WorkerPool(TestingSessionLocal)
+    assert workers.processar_pendentes() == 1
+
+    recibo = client.get(f"/comandas/{comanda_id}/recibo")
+    assert recibo.status_code == 200
+    assert recibo.json()["valor_total"] == pytest.approx(15.0)
+    assert "2x Isca" in recibo.json()["descricao"]
+
+    stats = workers.estatisticas(TestingSessionLocal())
+    assert stats["fila"]["CONCLUIDO"] == 1
+    assert stats["executados"] == 1
+
+
+def test_gerar_recibo_idempotente():
+    comanda_id = abrir_comanda_com_item()
+    client.put(f"/comandas/{comanda_id}/checkout")
+
+    db = TestingSessionLocal()
+    gerar_recibo(db, comanda_id)
+    db.commit()
+    gerar_recibo(db, comanda_id)
+    db.commit()
+
+    assert db.query(Recibo).filter(Recibo.comanda_id == comanda_id).count() == 1
+    db.close()
+
+
+def test_job_com_erro_tenta_de_novo_e_depois_falha():
+    chamadas = []
+
+    @tarefa("sempre_falha")
+    def sempre_falha(db):
+        chamadas.append(1)
+        raise RuntimeError("falhou")
+
+    db = TestingSessionLocal()
+    job = enfileirar(db, "sempre_falha", max_tentativas=2)
+    db.commit()
+    job_id = job.id
+    db.close()
+
+    workers = WorkerPool(TestingSessionLocal)
+    assert workers.processar_pendentes() == 1
+
+    # Primeira falha: volta para a fila com backoff (não roda de novo na hora)
+    db = TestingSessionLocal()
+    job = db.get(Job, job_id)
+    assert job.status == "PENDENTE"
+    assert job.executar_em > job.criado_em
+    assert workers.processar_pendentes() == 0
+
+    # Antecipa a retentativa; a segunda falha esgota as tentativas
+    job.executar_em = job.criado_em
+    db.commit()
+    assert workers.processar_pendentes() == 1
+    db.refresh(job)
+    assert job.status == "FALHOU"
+    assert "falhou" in job.erro
+    assert len(chamadas) == 2
+    db.close()
+
+    stats = workers.estatisticas(TestingSessionLocal())
+    assert stats["falhas"] == 2
+    assert stats["retentativas"] == 1
+
+
+def test_handler_nao_segura_o_lock_de_escrita(tmp_path):
+    # Arquivo com WAL, como em produção (o banco em memória não tem locks)
+    engine_arquivo = criar_engine(str(tmp_path / "fila.db"))
+    Base.metadata.create_all(bind=engine_arquivo)
+    Sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine_arquivo)
+    escritas = []
+
+    @tarefa("escreve_durante_o_handler")
+    def escreve_durante_o_handler(db):
+        if escritas:
+            return
+        # Uma escrita da API enquanto o handler roda não espera por ele
+        outra = Sessao()
+        try:
+            executar_transacao(outra, lambda db: enfileirar(db, "outro"), "teste", prazo=0.2)
+            escritas.append(1)
+        finally:
+            outra.close()
+
+    db = Sessao()
+    job = enfileirar(db, "escreve_durante_o_handler")
+    db.commit()
+    job_id = job.id
+    db.close()
+
+    assert WorkerPool(Sessao).processar_proximo()
+    assert escritas == [1]
+    db = Sessao()
+    assert db.get(Job, job_id).status == "CONCLUIDO"
+    db.close()
+    engine_arquivo.dispose()
+
+
+def test_recuperacao_nao_devolve_job_em_execucao(tmp_path, monkeypatch):
+    engine_arquivo = criar_engine(str(tmp_path / "fila.db"))
+    Base.metadata.create_all(bind=engine_arquivo)
+    Sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine_arquivo)
+    rodando = threading.Event()
+    liberar = threading.Event()
+    chamadas = []
+
+    @tarefa("demorado")
+    def demorado(db):
+        chamadas.append(1)
+        rodando.set()
+        liberar.wait(5)
+
+    db = Sessao()
+    enfileirar(db, "demorado")
+    db.commit()
+    db.close()
+
+    # Recuperação lenta: o segundo worker chega enquanto o primeiro recupera
+    workers = WorkerPool(Sessao)
+    recuperar = workers.recuperar_interrompidos
+
+    def recuperar_devagar(session_factory):
+        time.sleep(0.2)
+        recuperar(session_factory)
+
+    monkeypatch.setattr(workers, "recuperar_interrompidos", recuperar_devagar)
+
+    primeiro = threading.Thread(target=workers.processar_proximo)
+    primeiro.start()
+    time.sleep(0.1)
+    segundo = threading.Thread(target=workers.processar_proximo)
+    segundo.start()
+
+    assert rodando.wait(5)
+    time.sleep(0.3)  # Tempo para o outro worker terminar a recuperação e a busca
+    liberar.set()
+    primeiro.join(5)
+    segundo.join(5)
+
+    # O job rodou uma vez só e não foi devolvido para a fila no meio da execução
+    assert len(chamadas) == 1
+    db = Sessao()
+    job = db.query(Job).one()
+    assert (job.status, job.tentativas) == ("CONCLUIDO", 1)
+    db.close()
+    engine_arquivo.dispose()
+
+
+def test_falha_sem_conseguir_registrar_e_retomada_depois_do_prazo(monkeypatch):
+    chamadas = []
+
+    @tarefa("falha_com_banco_ocupado")
+    def falha_com_banco_ocupado(db):
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            raise RuntimeError("falhou")
+
+    executar = modulo_fila.executar_transacao
+
+    def banco_ocupado_na_falha(db, operacao, rota, **kwargs):
+        if rota == "job:falha":
+            raise HTTPException(status_code=503, detail="Banco de dados ocupado")
+        return executar(db, operacao, rota, **kwargs)
+
+    db = TestingSessionLocal()
+    job = enfileirar(db, "falha_com_banco_ocupado")
+    db.commit()
+    job_id = job.id
+
+    workers = WorkerPool(TestingSessionLocal, prazo_execucao=60)
+    with monkeypatch.context() as m:
+        m.setattr(modulo_fila, "executar_transacao", banco_ocupado_na_falha)
+        assert workers.processar_proximo()  # Não estoura para o loop do worker
+
+    # Ficou EXECUTANDO; dentro do prazo ninguém pega de novo
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert job.status == "EXECUTANDO"
+    assert workers.processar_pendentes() == 0
+
+    # Passado o prazo, a reserva é considerada perdida e o job roda de novo
+    job.iniciado_em -= timedelta(seconds=61)
+    db.commit()
+    assert workers.processar_pendentes() == 1
+    db.refresh(job)
+    assert (job.status, job.tentativas) == ("CONCLUIDO", 2)
+    db.close()
+
+
+def test_espera_conta_a_partir_de_executar_em():
+    @tarefa("rapido")
+    def rapido(db):
+        pass
+
+    # Job criado há uma hora, liberado agora (como uma retentativa depois do backoff)
+    db = TestingSessionLocal()
+    job = enfileirar(db, "rapido")
+    job.criado_em -= timedelta(hours=1)
+    db.commit()
+    db.close()
+
+    workers = WorkerPool(TestingSessionLocal)
+    assert workers.processar_pendentes() == 1
+    stats = workers.estatisticas(TestingSessionLocal())
+    assert stats["executados"] == 1
+    assert stats["espera_max_s"] < 60
@@ -1,7 +1,7 @@
 from unittest.mock import MagicMock
 from fastapi.testclient import TestClient
 
-from App.api.main import app, get_db
+from App.api.main import app, get_db, get_read_db
 
 client = TestClient(app)
 
@@ -45,9 +45,11 @@ def test_criar_cliente_mock():
 
 def test_cliente_nao_existe_mock():
     fake_db = MagicMock()
-    fake_db.query().filter().first.return_value = None
+    # Busca por id usa Session.get (App/db/repositorio.py)
+    fake_db.get.return_value = None
 
-    app.dependency_overrides[get_db] = lambda: fake_db
+    # Rotas GET usam a conexão só de leitura
+    app.dependency_overrides[get_read_db] = lambda: fake_db
 
     response = client.get("/clientes/999")
 
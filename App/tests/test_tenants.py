@@ -0,0 +1,116 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import App.db.tenants as modulo_tenants
+import App.jobs.fila as modulo_fila
+from App.api.main import app
+from App.db.tenants import CacheTenants
+from App.jobs.fila import WorkerPool
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tenants(tmp_path, monkeypatch):
+    # Usa os bancos de verdade (sem override) numa pasta temporária
+    anteriores = dict(app.dependency_overrides)
+    app.dependency_overrides.clear()
+
+    cache = CacheTenants(maximo=2, pasta=str(tmp_path))
+    monkeypatch.setattr(modulo_tenants, "tenants", cache)
+    monkeypatch.setattr(modulo_fila, "tenants", cache)
+    yield cache
+
+    cache.fechar_todos()
+    app.dependency_overrides.update(anteriores)
+
+
+def cadastrar(cabecalhos, nome, cpf):
+    return client.post(
+        "/clientes",
+        json={"nome": nome, "cpf": cpf, "telefone": "", "email": ""},
+        headers=cabecalhos,
+    )
+
+
+def test_pesqueiros_isolados(tenants, tmp_path):
+    assert cadastrar({"X-Pesqueiro": "represa-norte"}, "Norte", "1").status_code == 200
+    # Mesmo CPF em outro pesqueiro não é duplicado
+    assert cadastrar({"X-Pesqueiro": "lago-sul"}, "Sul", "1").status_code == 200
+
+    norte = client.get("/clientes", headers={"X-Pesqueiro": "represa-norte"}).json()
+    assert [c["nome"] for c in norte] == ["Norte"]
+
+    # Prefixo no caminho funciona igual ao header
+    sul = client.get("/u/lago-sul/clientes").json()
+    assert [c["nome"] for c in sul] == ["Sul"]
+
+    assert (tmp_path / "represa-norte.db").exists()
+    assert (tmp_path / "lago-sul.db").exists()
+
+
+def test_lru_descarta_pesqueiro_menos_usado(tenants):
+    for nome in ("a", "b", "c"):
+        assert cadastrar({"X-Pesqueiro": nome}, nome.upper(), "123").status_code == 200
+
+    # maximo=2: "a" saiu do cache
+    assert list(tenants._abertos) == ["b", "c"]
+
+    # Volta a abrir do arquivo, com os dados intactos
+    resp = client.get("/u/a/clientes")
+    assert [c["nome"] for c in resp.json()] == ["A"]
+    assert list(tenants._abertos) == ["c", "a"]
+
+
+def test_pesqueiro_invalido(tenants):
+    resp = client.get("/clientes", headers={"X-Pesqueiro": "../../etc"})
+    assert resp.status_code == 400
+
+
+def test_workers_atendem_todos_os_pesqueiros(tenants):
+    cabecalhos = {"X-Pesqueiro": "represa-norte"}
+    cliente_id = cadastrar(cabecalhos, "Norte", "1").json()["id"]
+    comanda_id = client.post("/comandas", json={"cliente_id": cliente_id}, headers=cabecalhos).json()["id"]
+    assert client.put(f"/comandas/{comanda_id}/checkout", headers=cabecalhos).status_code == 200
+
+    workers = WorkerPool()
+    assert workers.processar_pendentes() == 1
+    assert client.get(f"/u/represa-norte/comandas/{comanda_id}/recibo").status_code == 200
+    assert client.get(f"/u/lago-sul/comandas/{comanda_id}/recibo").status_code == 404
+
+    # Latência contada na fila de cada pesqueiro, como a profundidade
+    norte = tenants.obter("represa-norte").ReadSessionLocal()
+    assert workers.estatisticas(norte, "represa-norte")["executados"] == 1
+    sul = tenants.obter("lago-sul").ReadSessionLocal()
+    assert workers.estatisticas(sul, "lago-sul")["executados"] == 0
+    norte.close()
+    sul.close()
+
+
+def test_pesqueiro_com_job_na_fila_nao_sai_do_cache(tenants):
+    cabecalhos = {"X-Pesqueiro": "a"}
+    cliente_id = cadastrar(cabecalhos, "A", "1").json()["id"]
+    comanda_id = client.post("/comandas", json={"cliente_id": cliente_id}, headers=cabecalhos).json()["id"]
+    assert client.put(f"/comandas/{comanda_id}/checkout", headers=cabecalhos).status_code == 200
+
+    # "a" é o menos usado, mas tem recibo para gerar: sai o "b"
+    for nome in ("b", "c"):
+        cadastrar({"X-Pesqueiro": nome}, nome.upper(), "1")
+    assert list(tenants._abertos) == ["a", "c"]
+
+    assert WorkerPool().processar_pendentes() == 1
+
+    # Fila vazia: volta a ser descartado normalmente
+    cadastrar({"X-Pesqueiro": "d"}, "D", "1")
+    assert list(tenants._abertos) == ["c", "d"]
+    assert client.get(f"/u/a/comandas/{comanda_id}/recibo").status_code == 200
+
+
+def test_reset_db_so_do_pesqueiro_e_pelo_executor(tenants):
+    cadastrar({"X-Pesqueiro": "a"}, "A", "1")
+    cadastrar({"X-Pesqueiro": "b"}, "B", "1")
+
+    assert client.post("/u/a/admin/reset-db").status_code == 200
+    assert client.get("/u/a/clientes").json() == []
+    assert [c["nome"] for c in client.get("/u/b/clientes").json()] == ["B"]
+    assert client.get("/admin/transacoes").json()["reset_db"]["commits"] >= 1
@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import App.api.main  # noqa: F401 (registra todos os modelos no Base)
+from App.db.connection import Base, criar_engine
+from App.db.transacao import (
+    INTEGRIDADE, OCUPADO, OUTRO, classificar_erro, executar_transacao, metricas
+)
+from App.models.cliente import Cliente
+from App.models.comanda import Comanda
+
+
+def erro_sqlite(mensagem):
+    return OperationalError("INSERT ...", {}, sqlite3.OperationalError(mensagem))
+
+
+def test_classificar_erro():
+    assert classificar_erro(erro_sqlite("database is locked")) == OCUPADO
+    assert classificar_erro(erro_sqlite("database table is locked")) == OCUPADO
+    assert classificar_erro(
+        IntegrityError("INSERT ...", {}, sqlite3.IntegrityError("UNIQUE constraint failed"))
+    ) == INTEGRIDADE
+    assert classificar_erro(erro_sqlite("no such table: clientes")) == OUTRO
+    assert classificar_erro(ValueError("x")) == OUTRO
+
+
+class SessaoFalsa:
+    def connection(self, **kwargs):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_banco_ocupado_tenta_de_novo():
+    tentativas = []
+
+    def operacao(db):
+        tentativas.append(1)
+        if len(tentativas) < 3:
+            raise erro_sqlite("database is locked")
+        return "ok"
+
+    assert executar_transacao(SessaoFalsa(), operacao, "teste_ocupado") == "ok"
+    assert len(tentativas) == 3
+    resumo = metricas.resumo()["teste_ocupado"]
+    assert resumo["esperas_lock"] == 2
+    assert resumo["retentativas"] == 2
+    assert resumo["commits"] == 1
+
+
+def test_banco_ocupado_depois_do_prazo_vira_503():
+    def operacao(db):
+        raise erro_sqlite("database is locked")
+
+    with pytest.raises(HTTPException) as erro:
+        executar_transacao(SessaoFalsa(), operacao, "teste_prazo", prazo=0.05)
+    assert erro.value.status_code == 503
+    assert metricas.resumo()["teste_prazo"]["desistencias"] == 1
+
+
+def test_erro_de_integridade_nao_tenta_de_novo():
+    tentativas = []
+
+    def operacao(db):
+        tentativas.append(1)
+        raise IntegrityError("INSERT ...", {}, sqlite3.IntegrityError("UNIQUE constraint failed"))
+
+    with pytest.raises(HTTPException) as erro:
+        executar_transacao(SessaoFalsa(), operacao, "teste_integridade", erro_integridade="Duplicado")
+    assert erro.value.status_code == 400
+    assert erro.value.detail == "Duplicado"
+    assert len(tentativas) == 1
+
+
+def test_escritas_concorrentes_sem_falhas(tmp_path):
+    # Stress: várias threads escrevendo no mesmo arquivo ao mesmo tempo,
+    # todas disputando a mesma linha (valor_total da comanda)
+    engine = criar_engine(str(tmp_path / "stress.db"))
+    Base.metadata.create_all(bind=engine)
+    Sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Sessao()
+    cliente = Cliente(nome="Stress", cpf="00000000000", telefone="", email="")
+    db.add(cliente)
+    db.commit()
+    comanda = Comanda(cliente_id=cliente.id, valor_total=0.0)
+    db.add(comanda)
+    db.commit()
+    comanda_id = comanda.id
+    db.close()
+
+    threads_total, escritas_por_thread = 8, 25
+    falhas = []
+
+    def escritor(numero):
+        db = Sessao()
+        try:
+            for i in range(escritas_por_thread):
+                def operacao(db):
+                    db.add(Cliente(nome="C", cpf=f"{numero}-{i}", telefone="", email=""))
+                    db.get(Comanda, comanda_id).valor_total += 1.0
+
+                try:
+                    executar_transacao(db, operacao, "teste_stress")
+                except Exception as exc:
+                    falhas.append(exc)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=escritor, args=(n,)) for n in range(threads_total)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert falhas == []
+    db = Sessao()
+    assert db.query(Cliente).count() == 1 + threads_total * escritas_por_thread
+    # Nenhuma atualização perdida no contador disputado
+    assert db.get(Comanda, comanda_id).valor_total == threads_total * escritas_por_thread
+    db.close()
+    engine.dispose()
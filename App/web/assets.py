@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+
+import brotli
+from starlette.responses import FileResponse, Response
+
+from App.api.etag import nao_modificado
+
+logger = logging.getLogger(__name__)
+
+# Frontend servido pela própria API (ver rotas /app em App/api/main.py).
+#
+# `construir()` roda no build/deploy (task front), nunca ao importar a API:
+# cada asset ganha o hash do conteúdo no nome (app.3f2a9c1b0d4e.js), então
+# pode ficar em cache "para sempre", e já sai comprimido em .br e .gz. O
+# index.html é reescrito para apontar para os nomes com hash e nunca é
+# cacheado sem revalidar (ETag).
+PASTA = os.path.dirname(os.path.abspath(__file__))
+PASTA_FONTES = os.path.join(PASTA, "frontend")
+PASTA_DIST = os.path.join(PASTA, "dist")
+
+PAGINA = "index.html"
+MANIFESTO = "manifest.json"
+ASSETS = ("app.css", "app.js")
+URL_STATIC = "/app/static/"
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_PAGINA = "no-cache"
+
+
+def _hash(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()[:12]
+
+
+def _versao_fontes(fontes):
+    # Muda sempre que algum arquivo do frontend muda (decide se precisa reconstruir)
+    resumo = hashlib.sha256()
+    for nome in (PAGINA, *ASSETS):
+        with open(os.path.join(fontes, nome), "rb") as arquivo:
+            resumo.update(nome.encode() + b"\0" + arquivo.read())
+    return resumo.hexdigest()
+
+
+def _gravar(pasta, versao, nome, conteudo):
+    """Grava o arquivo e as versões comprimidas. Devolve a entrada do manifesto."""
+    with open(os.path.join(pasta, nome), "wb") as arquivo:
+        arquivo.write(conteudo)
+
+    codificacoes = {}
+    variantes = [
+        ("br", ".br", lambda dados: brotli.compress(dados, quality=11)),
+        ("gzip", ".gz", lambda dados: gzip.compress(dados, compresslevel=9, mtime=0)),
+    ]
+    for codificacao, extensao, comprimir in variantes:
+        comprimido = comprimir(conteudo)
+        if len(comprimido) >= len(conteudo):
+            continue  # Não compensa
+        with open(os.path.join(pasta, nome + extensao), "wb") as arquivo:
+            arquivo.write(comprimido)
+        codificacoes[codificacao] = f"{versao}/{nome}{extensao}"
+
+    tipo = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+    if tipo.startswith("text/") or tipo == "application/javascript":
+        tipo += "; charset=utf-8"
+    return {
+        "arquivo": f"{versao}/{nome}",
+        "tipo": tipo,
+        "etag": '"' + _hash(conteudo) + '"',
+        "codificacoes": codificacoes,
+    }
+
+
+def _ler_manifesto(destino):
+    try:
+        with open(os.path.join(destino, MANIFESTO), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def construir(fontes=PASTA_FONTES, destino=PASTA_DIST):
+    """
+    Gera os assets em dist/<versão>/ e aponta o manifest.json para eles.
+
+    Nada é apagado nem reescrito no lugar: a pasta da versão é montada numa
+    pasta temporária e renomeada, e o manifesto é trocado com os.replace.
+    Quem estiver servindo a versão anterior continua achando os arquivos.
+    """
+    os.makedirs(destino, exist_ok=True)
+    anterior = _ler_manifesto(destino)
+    versao_fontes = _versao_fontes(fontes)
+    versao = versao_fontes[:12]
+
+    temporaria = tempfile.mkdtemp(prefix=".build-", dir=destino)
+    try:
+        manifesto = {"versao": versao_fontes, "pasta": versao, "assets": {}, "pagina": None}
+        with open(os.path.join(fontes, PAGINA), encoding="utf-8") as arquivo:
+            pagina = arquivo.read()
+
+        for nome in ASSETS:
+            with open(os.path.join(fontes, nome), "rb") as arquivo:
+                conteudo = arquivo.read()
+            base, extensao = os.path.splitext(nome)
+            nome_hash = f"{base}.{_hash(conteudo)}{extensao}"
+            manifesto["assets"][nome_hash] = _gravar(temporaria, versao, nome_hash, conteudo)
+            pagina = pagina.replace(f'"{nome}"', f'"{URL_STATIC}{nome_hash}"')
+
+        manifesto["pagina"] = _gravar(temporaria, versao, PAGINA, pagina.encode("utf-8"))
+
+        os.chmod(temporaria, 0o755)  # mkdtemp cria com 0o700
+        try:
+            os.rename(temporaria, os.path.join(destino, versao))
+        except OSError:
+            pass  # Essa versão já foi gerada (por outro processo, talvez): mesmo conteúdo
+    finally:
+        shutil.rmtree(temporaria, ignore_errors=True)
+
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=destino, prefix=".manifest-", delete=False
+    ) as arquivo:
+        json.dump(manifesto, arquivo, indent=2)
+    os.chmod(arquivo.name, 0o644)
+    os.replace(arquivo.name, os.path.join(destino, MANIFESTO))
+
+    # Mantém só a versão nova e a anterior (ainda servida por quem não reiniciou)
+    manter = {versao, anterior and anterior.get("pasta")}
+    for nome in os.listdir(destino):
+        caminho = os.path.join(destino, nome)
+        if nome not in manter and not nome.startswith(".") and os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+    return manifesto
+
+
+def carregar(fontes=PASTA_FONTES, destino=PASTA_DIST):
+    """
+    Lê o manifest.json gerado por `construir()` (task front). Só lê: se o
+    frontend não foi gerado, levanta RuntimeError em vez de gerar aqui.
+    """
+    manifesto = _ler_manifesto(destino)
+    if manifesto is None or "pasta" not in manifesto:
+        raise RuntimeError(
+            f"Frontend não gerado em {destino}. Rode `poetry run task front` antes de subir a API."
+        )
+    if os.path.isdir(fontes) and manifesto["versao"] != _versao_fontes(fontes):
+        logger.warning("Frontend em %s está desatualizado; rode `poetry run task front`.", destino)
+    return manifesto
+
+
+def _aceita(accept_encoding, codificacao):
+    for parte in accept_encoding.split(","):
+        nome, _, parametros = parte.strip().partition(";")
+        if nome.strip().lower() != codificacao:
+            continue
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                return float(parametros[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def responder(entrada, request, destino=PASTA_DIST, cache_control=CACHE_IMUTAVEL):
+    """Resposta para uma entrada do manifesto, na melhor codificação aceita."""
+    arquivo = entrada["arquivo"]
+    etag = entrada["etag"]
+    codificacao_escolhida = None
+    aceitas = request.headers.get("accept-encoding", "")
+    for codificacao in ("br", "gzip"):
+        if codificacao in entrada["codificacoes"] and _aceita(aceitas, codificacao):
+            arquivo = entrada["codificacoes"][codificacao]
+            codificacao_escolhida = codificacao
+            # ETag forte é por representação (RFC 7232): br, gzip e sem compressão diferem
+            etag = f'{etag[:-1]}-{codificacao}"'
+            break
+
+    cabecalhos = {
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+    }
+    if nao_modificado(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabecalhos)
+
+    if codificacao_escolhida:
+        cabecalhos["Content-Encoding"] = codificacao_escolhida
+    return FileResponse(os.path.join(destino, arquivo), media_type=entrada["tipo"], headers=cabecalhos)
+
+
+if __name__ == "__main__":
+    gerado = construir()
+    print(f"Frontend gerado em {PASTA_DIST}: {', '.join(gerado['assets'])}")
@@ -0,0 +1,223 @@
+// A página é servida pela própria API (em /app/ ou /u/<pesqueiro>/app/),
+// então as chamadas são same-origin e sem preflight de CORS
+const API = location.pathname.replace(/\/app(\/.*)?$/, "");
+
+// Inicialização
+listarClientes();
+listarProdutos();
+
+async function listarClientes() {
+    const res = await fetch(API + "/clientes");
+    const dados = await res.json();
+    const select = document.getElementById("listaClientes");
+    select.innerHTML = "";
+    dados.forEach(c => {
+        select.innerHTML += `<option value="${c.id}">${c.nome} (CPF: ${c.cpf})</option>`;
+    });
+}
+
+async function listarProdutos() {
+    const res = await fetch(API + "/produtos");
+    const dados = await res.json();
+    const select = document.getElementById("listaProdutos");
+    select.innerHTML = "";
+    dados.forEach(p => {
+        select.innerHTML += `<option value="${p.id}">${p.nome} (R$ ${p.preco.toFixed(2)})</option>`;
+    });
+}
+
+async function cadastrarProduto() {
+    const nome = document.getElementById("nomeProdNovo").value;
+    const preco = parseFloat(document.getElementById("precoProdNovo").value);
+
+    if(!nome || isNaN(preco)) return alert("Preencha tudo!");
+
+    const res = await fetch(API + "/produtos", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ nome, preco })
+    });
+
+    if(res.ok) {
+        alert("Produto Salvo!");
+        document.getElementById("nomeProdNovo").value = "";
+        document.getElementById("precoProdNovo").value = "";
+        listarProdutos();
+    } else {
+        const errorData = await res.json();
+        alert(`Erro ao cadastrar produto: ${errorData.detail}`);
+    }
+}
+
+async function cadastrarCliente() {
+    const nome = document.getElementById("nomeCli").value;
+    const cpf = document.getElementById("cpfCli").value;
+    
+    if(!nome || !cpf) return alert("Preencha tudo!");
+
+    const res = await fetch(API + "/clientes", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ nome, cpf, email: "", telefone: "" })
+    });
+
+    if(res.ok) {
+        alert("Cliente Salvo!");
+        document.getElementById("nomeCli").value = "";
+        document.getElementById("cpfCli").value = "";
+        listarClientes();
+    } else {
+        alert("Erro! CPF duplicado?");
+    }
+}
+
+async function abrirComanda() {
+    const clienteId = document.getElementById("listaClientes").value;
+    const res = await fetch(API + "/comandas", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ cliente_id: clienteId })
+    });
+
+    if (res.ok) {
+        const data = await res.json();
+        alert("Comanda Aberta: #" + data.id);
+        carregarPainel(data);
+    } else {
+        const errorData = await res.json();
+        alert(`Erro ao abrir comanda: ${errorData.detail}`);
+    }
+}
+
+function montarListaPedidos(itens) {
+    const lista = document.getElementById('listaPedidosDetalhe');
+    lista.innerHTML = "";
+    
+    if (!itens || itens.length === 0) {
+        lista.innerHTML = "<tr><td colspan='4'>Nenhum pedido lançado.</td></tr>";
+        return;
+    }
+
+    itens.forEach(item => {
+        const totalItem = (item.quantidade * item.preco_unitario);
+        lista.innerHTML += `
+            <tr>
+                <td>${item.nome_produto}</td>
+                <td>${item.quantidade}</td>
+                <td>R$ ${item.preco_unitario.toFixed(2)}</td>
+                <td>R$ ${totalItem.toFixed(2)}</td>
+            </tr>
+        `;
+    });
+}
+
+async function buscarComanda() {
+    const id = document.getElementById("idComandaInput").value;
+    if(!id) return alert("Digite o ID");
+
+    const res = await fetch(API + "/comandas/" + id);
+    if(res.ok) {
+        const data = await res.json();
+        carregarPainel(data);
+    } else {
+        alert("Comanda não encontrada!");
+    }
+}
+
+function carregarPainel(data) {
+    document.getElementById("painelAtivo").style.display = "block";
+    document.getElementById("lblComandaID").innerText = "#" + data.id;
+    document.getElementById("idComandaInput").value = data.id; 
+    
+    const valor = data.valor_total.toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' });
+    document.getElementById("lblTotal").innerText = valor;
+    
+    document.getElementById("lblStatus").innerText = data.status;
+    
+    const btnCheckout = document.getElementById("btnCheckout");
+    const btnDelete = document.getElementById("btnDelete");
+    
+    // Controle de Botão de Pagamento/Status
+    if(data.status === "ABERTA") {
+        btnCheckout.style.display = 'block'; 
+        btnDelete.style.display = 'none';    
+        document.getElementById("lblStatus").style.color = 'green';
+    } else if (data.status === "PAGA") {
+         btnCheckout.style.display = 'none';
+         btnDelete.style.display = 'block';   // Mostra DELETAR quando PAGA
+         document.getElementById("lblStatus").style.color = 'red';
+    } else {
+        btnCheckout.style.display = 'none';
+        btnDelete.style.display = 'none';
+    }
+
+    montarListaPedidos(data.itens); 
+}
+
+async function lancarItem() {
+    const comanda_id = document.getElementById("idComandaInput").value;
+    const produto_id = parseInt(document.getElementById("listaProdutos").value);
+    const quantidade = parseInt(document.getElementById("qtdProd").value);
+
+    if(!comanda_id) return alert("Selecione ou Busque uma comanda antes!");
+
+    const res = await fetch(API + "/itens", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ comanda_id: parseInt(comanda_id), produto_id, quantidade })
+    });
+
+    if(res.ok) {
+        alert("Item adicionado com sucesso!");
+        buscarComanda(); 
+    } else {
+        const errorData = await res.json();
+        alert(`Erro ao lançar item: ${errorData.detail}`);
+    }
+}
+
+async function fecharComanda() {
+    const id = document.getElementById("idComandaInput").value;
+    if (!id) return alert("Por favor, busque a comanda antes de fechar.");
+
+    if (!confirm(`Confirma o pagamento e o fechamento da Comanda #${id}? O valor é de ${document.getElementById("lblTotal").innerText}.`)) {
+        return; 
+    }
+
+    const res = await fetch(`${API}/comandas/${id}/checkout`, {
+        method: 'PUT' 
+    });
+
+    if (res.ok) {
+        alert(`Comanda #${id} FINALIZADA e PAGA!`);
+        buscarComanda(); 
+    } else {
+        const errorData = await res.json();
+        alert(`Erro ao fechar a comanda: ${errorData.detail}`);
+    }
+}
+
+async function deletarComanda() {
+    const id = document.getElementById("idComandaInput").value;
+    if (!id) return alert("Por favor, digite o ID da comanda para deletar.");
+
+    if (!confirm(`ATENÇÃO: Confirma a EXCLUSÃO PERMANENTE da Comanda #${id} e de todos os seus itens?`)) {
+        return;
+    }
+
+    const res = await fetch(`${API}/comandas/${id}`, {
+        method: 'DELETE'
+    });
+
+    if (res.ok) {
+        alert(`Comanda #${id} e todos os seus itens foram deletados com sucesso.`);
+        // Limpa o painel após a exclusão
+        document.getElementById("painelAtivo").style.display = 'none';
+        document.getElementById("lblTotal").innerText = 'R$ 0,00';
+        document.getElementById('listaPedidosDetalhe').innerHTML = "<tr><td colspan='4'>Nenhum registro ativo.</td></tr>";
+        document.getElementById("idComandaInput").value = '';
+    } else {
+        const errorData = await res.json();
+        alert(`Erro ao deletar: ${errorData.detail}`);
+    }
+}